@@ -343,6 +343,19 @@ def api_search():
     return jsonify(results)
 
 
+@app.route('/api/search/summary')
+def api_search_summary():
+    """API endpoint for list views: search results without the per-store listings."""
+    query = request.args.get('q', '')
+    limit = int(request.args.get('limit', 20))
+
+    if not query:
+        return jsonify({'error': 'Query parameter required'}), 400
+
+    results = search_products(query, limit=limit, include_stores=False)
+    return jsonify(results)
+
+
 @app.route('/api/product/<int:master_id>')
 def api_product(master_id):
     """API endpoint for product details (master + variants)."""
@@ -1,5 +1,6 @@
 """Base scraper class with rate limiting, robots.txt checking, and HTML caching."""
 import asyncio
+import re
 import time
 import hashlib
 import json
@@ -11,6 +12,11 @@ from playwright.async_api import async_playwright, Browser, Page, Playwright, Ti
 import aiohttp
 import config
 
+# Checkout, cart and account pages are never scraped; one alternation replaces a substring test per path
+_BLOCKED_PATHS = ['/checkout', '/cart', '/basket', '/account', '/login', '/register',
+                  '/signin', '/signup', '/profile', '/my-account', '/user']
+_BLOCKED_PATH_RE = re.compile('|'.join(map(re.escape, _BLOCKED_PATHS)))
+
 
 class BaseScraper:
     """Base class for all store scrapers with common functionality."""
@@ -21,28 +27,60 @@ class BaseScraper:
         self.domain = urlparse(base_url).netloc
         self.last_request_time = 0.0
         self.rate_limit = config.RATE_LIMIT_PER_DOMAIN
+        self.rate_limit_lock = asyncio.Lock()
+        # Caps pages in flight across all callers, so nested _run_bounded/gather calls stay within MAX_CONCURRENCY
+        self.fetch_semaphore = asyncio.Semaphore(max(1, config.MAX_CONCURRENCY))
         self.robots_parser = None
         self.cache_dir = config.CACHE_DIR / self.store_name
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.browser: Optional[Browser] = None
         self.playwright: Optional[Playwright] = None
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        # Memoised _is_allowed_url results; the same URLs are checked by card parsing and fetching
+        self.allowed_url_cache: Dict[str, bool] = {}
+        self.category_filter: Optional[List[str]] = None
+        self.category_keywords: Dict[str, List[str]] = {}
+        # All keywords of the filtered categories, matched in one scan per URL
+        self.category_keyword_re: Optional[re.Pattern] = None
+        # Filter result per URL; category and listing links repeat across pages
+        self.category_match_cache: Dict[str, bool] = {}
         
+    async def _get_http_session(self) -> aiohttp.ClientSession:
+        """Get the shared aiohttp session, creating it with a keep-alive connection pool on first use."""
+        if self.http_session is None or self.http_session.closed:
+            # Per-host pool is at least MAX_CONCURRENCY, so fetch_semaphore and not the pool sets the HTTP fan-out
+            connector = aiohttp.TCPConnector(
+                limit=max(20, config.MAX_CONCURRENCY),
+                limit_per_host=max(6, config.MAX_CONCURRENCY),
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self.http_session = aiohttp.ClientSession(connector=connector)
+        return self.http_session
+    
+    async def _close_http_session(self):
+        """Close the shared aiohttp session if it was opened."""
+        if self.http_session is not None:
+            await self.http_session.close()
+            self.http_session = None
+    
     async def _check_robots_txt(self):
         """Check and parse robots.txt for the domain."""
         robots_url = urljoin(self.base_url, "/robots.txt")
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(robots_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        self.robots_parser = RobotFileParser()
-                        self.robots_parser.set_url(robots_url)
-                        # Parse content - parse() expects an iterable of lines
-                        self.robots_parser.read = lambda: None  # Prevent automatic fetch
-                        self.robots_parser.parse(content.splitlines())
-                        print(f"[OK] Loaded robots.txt for {self.domain}")
-                    else:
-                        print(f"[WARNING] robots.txt not found for {self.domain} (status {response.status})")
+            session = await self._get_http_session()
+            async with session.get(robots_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    self.robots_parser = RobotFileParser()
+                    self.robots_parser.set_url(robots_url)
+                    # Parse content - parse() expects an iterable of lines
+                    self.robots_parser.read = lambda: None  # Prevent automatic fetch
+                    self.robots_parser.parse(content.splitlines())
+                    print(f"[OK] Loaded robots.txt for {self.domain}")
+                else:
+                    print(f"[WARNING] robots.txt not found for {self.domain} (status {response.status})")
         except Exception as e:
             print(f"[WARNING] Could not load robots.txt for {self.domain}: {e}")
             # Default to allowing all if robots.txt is unavailable
@@ -50,10 +88,57 @@ class BaseScraper:
     
     def _is_allowed_url(self, url: str) -> bool:
         """Check if URL is allowed (not checkout, cart, or account pages)."""
-        url_lower = url.lower()
-        blocked_paths = ['/checkout', '/cart', '/basket', '/account', '/login', '/register', 
-                         '/signin', '/signup', '/profile', '/my-account', '/user']
-        return not any(path in url_lower for path in blocked_paths)
+        allowed = self.allowed_url_cache.get(url)
+        if allowed is None:
+            allowed = self.allowed_url_cache[url] = _BLOCKED_PATH_RE.search(url.lower()) is None
+        return allowed
+    
+    def set_category_filter(self, categories: List[str], category_keywords: Dict[str, List[str]]):
+        """
+        Set category filter to limit scraping to specific categories.
+
+        Args:
+            categories: List of category names to scrape (e.g., ["smartphones", "laptops"])
+            category_keywords: Dict mapping category names to URL keywords to match
+        """
+        self.category_filter = categories
+        self.category_keywords = category_keywords
+        keywords = [keyword for category in categories for keyword in category_keywords.get(category, [])]
+        self.category_keyword_re = re.compile('|'.join(map(re.escape, keywords))) if keywords else None
+        self.category_match_cache = {}
+        print(f"[INFO] {self.store_name.capitalize()} category filter set: {', '.join(categories)}")
+
+    def _matches_category_filter(self, url: str) -> bool:
+        """
+        Check if a URL matches the category filter.
+
+        Args:
+            url: URL to check
+
+        Returns:
+            True if URL matches filter (or no filter set), False otherwise
+        """
+        if not self.category_filter:
+            return True  # No filter, allow all
+
+        # Check if URL contains any keywords for selected categories (lowercased once per URL)
+        matches = self.category_match_cache.get(url)
+        if matches is None:
+            matches = (self.category_keyword_re is not None
+                       and self.category_keyword_re.search(url.lower()) is not None)
+            self.category_match_cache[url] = matches
+        return matches
+    
+    @staticmethod
+    def _discount_pct(price: Optional[float], original_price: Optional[float]) -> Optional[float]:
+        """Discount percentage of price relative to original_price, or None if either is missing."""
+        if not (price and original_price and original_price > 0):
+            return None
+        return (1.0 - price / original_price) * 100.0
+    
+    def _product_limit_reached(self, products: List[Dict]) -> bool:
+        """Check if MAX_PRODUCTS products have been collected (0 means no limit)."""
+        return config.MAX_PRODUCTS > 0 and len(products) >= config.MAX_PRODUCTS
     
     def _can_fetch(self, url: str) -> bool:
         """Check if URL can be fetched according to robots.txt and URL filtering."""
@@ -68,12 +153,23 @@ class BaseScraper:
         return self.robots_parser.can_fetch(user_agent, url)
     
     async def _rate_limit(self):
-        """Enforce rate limiting between requests."""
-        elapsed = time.time() - self.last_request_time
-        min_interval = 1.0 / self.rate_limit
-        if elapsed < min_interval:
-            await asyncio.sleep(min_interval - elapsed)
-        self.last_request_time = time.time()
+        """Enforce rate limiting between requests (safe to call from concurrent fetches)."""
+        async with self.rate_limit_lock:
+            elapsed = time.time() - self.last_request_time
+            min_interval = 1.0 / self.rate_limit
+            if elapsed < min_interval:
+                await asyncio.sleep(min_interval - elapsed)
+            self.last_request_time = time.time()
+    
+    async def _run_bounded(self, func, items: List) -> List:
+        """Await func(item) for every item, at most MAX_CONCURRENCY at a time; results keep item order."""
+        semaphore = asyncio.Semaphore(max(1, config.MAX_CONCURRENCY))
+        
+        async def run(item):
+            async with semaphore:
+                return await func(item)
+        
+        return await asyncio.gather(*(run(item) for item in items))
     
     def _get_cache_path(self, url: str) -> Path:
         """Get cache file path for a URL."""
@@ -121,6 +217,11 @@ class BaseScraper:
                 print(f"[OK] Using cached: {url}")
                 return cached_html
         
+        async with self.fetch_semaphore:
+            return await self._fetch_page_uncached(url)
+    
+    async def _fetch_page_uncached(self, url: str) -> Optional[str]:
+        """Load a page in the browser after rate limiting and save it to the cache."""
         # Rate limiting
         await self._rate_limit()
         
@@ -158,6 +259,53 @@ class BaseScraper:
                 traceback.print_exc()
             return None
     
+    async def _fetch_html(self, url: str, use_cache: bool = True) -> Optional[str]:
+        """Fetch a page over the shared HTTP session (no JavaScript), with the same checks and caching as _fetch_page."""
+        # Check robots.txt and URL filtering
+        if not self._can_fetch(url):
+            if not self._is_allowed_url(url):
+                print(f"[BLOCKED] URL (checkout/cart/account): {url}")
+            else:
+                print(f"[BLOCKED] robots.txt: {url}")
+            return None
+        
+        # Check cache first
+        if use_cache:
+            cached_html = self._load_from_cache(url)
+            if cached_html:
+                print(f"[OK] Using cached: {url}")
+                return cached_html
+        
+        async with self.fetch_semaphore:
+            return await self._fetch_html_uncached(url)
+    
+    async def _fetch_html_uncached(self, url: str) -> Optional[str]:
+        """GET a page over the shared HTTP session after rate limiting and save it to the cache."""
+        # Rate limiting
+        await self._rate_limit()
+        
+        try:
+            session = await self._get_http_session()
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9,el;q=0.8'
+            }
+            timeout = aiohttp.ClientTimeout(total=config.TIMEOUT / 1000)
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                if response.status != 200:
+                    print(f"[WARNING] HTTP {response.status} fetching: {url}")
+                    return None
+                html = await response.text()
+            
+            # Save to cache
+            self._save_to_cache(url, html)
+            print(f"[OK] Fetched (HTTP): {url}")
+            return html
+        except Exception as e:
+            print(f"[ERROR] Error fetching {url}: {e}")
+            return None
+    
     async def init_browser(self):
         """Initialize Playwright browser with realistic user agent and anti-detection measures."""
         self.playwright = await async_playwright().start()
@@ -227,7 +375,8 @@ class BaseScraper:
         print(f"[OK] Browser initialized for {self.store_name} with anti-detection")
     
     async def close_browser(self):
-        """Close browser."""
+        """Close browser and the shared HTTP session."""
+        await self._close_http_session()
         if hasattr(self, 'context') and self.context:
             await self.context.close()
             self.context = None
@@ -22,6 +22,9 @@ TIMEOUT = int(os.getenv("TIMEOUT", "30000"))
 ENABLE_CACHE = os.getenv("ENABLE_CACHE", "true").lower() == "true"
 MAX_PRODUCT_DETAIL_FETCH = int(os.getenv("MAX_PRODUCT_DETAIL_FETCH", "0"))
 MAX_CATEGORY_PAGES = int(os.getenv("MAX_CATEGORY_PAGES", "0"))
+MAX_PRODUCTS = int(os.getenv("MAX_PRODUCTS", "0"))
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "4"))
+HTTP_DETAIL_FETCH = os.getenv("HTTP_DETAIL_FETCH", "false").lower() == "true"
 
 # Target stores
 STORES = {
@@ -81,7 +81,7 @@ class Product(Base):
     price = Column(Float, nullable=False, index=True)
     currency = Column(String(10), default="EUR")
     original_price = Column(Float)  # For discounted items
-    discount_percentage = Column(Float)
+    discount_percentage = Column(Float, index=True)  # Best-deals queries order by it
     
     # Additional metadata
     image_url = Column(Text)
@@ -125,16 +125,24 @@ class PriceHistory(Base):
         return f"<PriceHistory(product_id={self.product_id}, price={self.price}, timestamp={self.timestamp})>"
 
 
+_engine = None
+_session_factory = None
+
+
 def get_engine():
-    """Get database engine."""
-    return create_engine(config.DATABASE_URL, echo=False)
+    """Get database engine (shared, so its connection pool is reused across sessions)."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(config.DATABASE_URL, echo=False)
+    return _engine
 
 
 def get_session():
     """Get database session."""
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
-    return Session()
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(bind=get_engine())
+    return _session_factory()
 
 
 def init_db():
@@ -149,6 +157,12 @@ def init_db():
                 with engine.begin() as conn:
                     conn.execute(text("ALTER TABLE products ADD COLUMN variant_id INTEGER"))
                 print("[OK] Added missing column: products.variant_id")
+            # create_all() does not add new indexes to tables that already exist
+            with engine.begin() as conn:
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_variant_id ON products (variant_id)"))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_products_discount_percentage ON products (discount_percentage)"
+                ))
     except Exception as e:
         print(f"[WARNING] Schema check failed: {e}")
     print(f"Database initialized at {config.DATABASE_URL}")
@@ -41,7 +41,14 @@ class ProductMatcher:
     ]
 
     def __init__(self):
-        self.session = get_session()
+        self._session = None
+
+    @property
+    def session(self):
+        """Database session, opened on first use so text-only helpers need no connection."""
+        if self._session is None:
+            self._session = get_session()
+        return self._session
 
     def normalize_text(self, text: str) -> str:
         """Normalize text for matching: lowercase, remove special chars, standardize units."""
@@ -397,7 +404,9 @@ class ProductMatcher:
 
     def close(self):
         """Close database session."""
-        self.session.close()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
 
 def run_product_matching(rematch: bool = False):
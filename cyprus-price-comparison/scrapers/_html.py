@@ -0,0 +1,148 @@
+"""lxml parsing, text and price helpers shared by the store scrapers."""
+import re
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Optional
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from cssselect import HTMLTranslator
+from urllib.parse import urljoin
+
+
+# Format detection and number extraction for prices that miss the fast path
+_EURO_DECIMAL_RE = re.compile(r',\d{2}$')
+_PRICE_NUM_RE = re.compile(r'(\d+\.?\d*)')
+
+# Leading <?xml ...?> declaration, which lxml rejects on already-decoded str input
+_XML_DECLARATION_RE = re.compile(r'^\s*<\?xml[^>]*>')
+
+# Pages are parsed with lxml directly: one shared parser and precompiled selectors
+# lxml parsers must not be shared between threads, so each parsing thread gets its own
+_PARSER_LOCAL = threading.local()
+_CSS_TRANSLATOR = HTMLTranslator()
+
+# Tags whose text is not page content (BeautifulSoup's get_text skips them too)
+_NON_TEXT_TAGS = {'script', 'style', 'template'}
+
+
+def _card_selector(css: str) -> etree.XPath:
+    """Compile a CSS selector that, like BeautifulSoup's select_one, only matches below the element."""
+    return etree.XPath(_CSS_TRANSLATOR.css_to_xpath(css, prefix='descendant::'))
+
+
+# Product card and page selectors common to the store layouts
+_CARD_LINK_XPATH = etree.XPath('descendant::a[@href]')
+_CARD_IMG_XPATH = etree.XPath('descendant::img[@src]')
+_CARD_BRAND_SEL = _card_selector('.brand, [class*="brand"]')
+_CARD_AVAILABILITY_SEL = _card_selector('.availability, .stock, [class*="stock"], [class*="available"]')
+_ORIGINAL_PRICE_SEL = CSSSelector('.original-price, .old-price, [class*="original-price"], [class*="old-price"]')
+_DESC_SELS = [CSSSelector(sel) for sel in
+              ('.description', '.product-description', '[class*="description"]', '[itemprop="description"]')]
+
+
+def _all_strings(elem):
+    """Yield the raw text fragments under an lxml element in document order."""
+    # Comments contribute no text of their own, but the text after them (their tail) still counts
+    if isinstance(elem.tag, str) and elem.tag not in _NON_TEXT_TAGS and elem.text:
+        yield elem.text
+    for child in elem:
+        yield from _all_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _stripped_strings(elem):
+    """Yield the stripped, non-empty text fragments under an lxml element in document order."""
+    for text in _all_strings(elem):
+        text = text.strip()
+        if text:
+            yield text
+
+
+def _element_text(elem) -> str:
+    """Text of an lxml element, equivalent to BeautifulSoup's get_text(strip=True)."""
+    # Leaf elements (most card fields) hold a single text node - no subtree walk needed
+    if len(elem) == 0 and isinstance(elem.tag, str) and elem.tag not in _NON_TEXT_TAGS:
+        return elem.text.strip() if elem.text else ""
+    return ''.join(_stripped_strings(elem))
+
+
+def _select_first(selector, tree):
+    """Return the first element matching a precompiled selector, or None."""
+    matches = selector(tree)
+    return matches[0] if matches else None
+
+
+def _join_url(base_url: str, href: str) -> str:
+    """urljoin(base_url, href), with a shortcut for root-relative hrefs on an origin-only base."""
+    # An origin-only base ("https://host/") plus a root-relative path that urljoin would not
+    # normalise (no dot segments, ;params, empty ?/# markers or control characters) is plain concatenation
+    if (href[:1] == '/' and href[1:2] != '/' and base_url.count('/') == 3 and base_url[-1:] == '/'
+            and '?' not in base_url and '#' not in base_url and '/.' not in href and ';' not in href
+            and '?#' not in href and href[-1:] not in ('?', '#') and href.isprintable()):
+        return base_url[:-1] + href
+    return urljoin(base_url, href)
+
+
+def _parse_html(html: str):
+    """Parse an HTML string with this thread's parser, or return None if it has no content."""
+    parser = getattr(_PARSER_LOCAL, 'parser', None)
+    if parser is None:
+        parser = _PARSER_LOCAL.parser = lxml_html.HTMLParser(recover=True)
+    try:
+        return lxml_html.fromstring(html, parser=parser)
+    except etree.ParserError:
+        return None
+    except ValueError:
+        # "Unicode strings with encoding declaration are not supported": the text is already
+        # decoded, so drop the declaration and parse the rest instead of failing the whole batch
+        try:
+            return lxml_html.fromstring(_XML_DECLARATION_RE.sub('', html, count=1), parser=parser)
+        except (etree.ParserError, ValueError):
+            return None
+
+
+async def _parse_html_async(html: str):
+    """Parse HTML in a worker thread; lxml releases the GIL while parsing, so concurrent fetches keep running."""
+    return await asyncio.to_thread(_parse_html, html)
+
+
+@lru_cache(maxsize=4096)
+def _parse_price(text: str) -> Optional[float]:
+    """Parse a price from non-empty text; cached because listing pages repeat the same price strings."""
+    # Remove currency symbols and whitespace
+    text = text.replace('€', '').replace('EUR', '').replace(' ', '').strip()
+
+    # Fast path: a bare number with at most one comma and one dot is resolved
+    # with plain string operations, using the same rules as the regex path below
+    if (text[:1].isdigit() and text.isascii() and text.count(',') <= 1 and text.count('.') <= 1
+            and text.replace(',', '').replace('.', '').isdigit()):
+        if text[-3:-2] == ',' and text[-2:].isdigit():
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+        price = float(text)
+        return price if 1 <= price <= 1000000 else None
+
+    # Handle European format (1.234,56) vs US format (1,234.56)
+    # If there's a comma followed by 2 digits at the end, it's likely European format
+    if _EURO_DECIMAL_RE.search(text):
+        # European format: 1.234,56 -> 1234.56
+        text = text.replace('.', '').replace(',', '.')
+    else:
+        # US format or simple: 1234.56 or 1234,56 -> 1234.56
+        text = text.replace(',', '')
+
+    # Extract number (including decimal)
+    price_match = _PRICE_NUM_RE.search(text)
+    if price_match:
+        try:
+            price = float(price_match.group(1))
+            # Sanity check: prices should be reasonable (between 1 and 1,000,000)
+            if 1 <= price <= 1000000:
+                return price
+        except ValueError:
+            pass
+    return None
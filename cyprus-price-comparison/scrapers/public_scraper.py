@@ -1,15 +1,54 @@
 ﻿"""Scraper for Public Cyprus (public.cy)."""
 import re
-import gzip
+import asyncio
+import zlib
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional, Set
-from bs4 import BeautifulSoup
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+from lxml import etree
+from lxml.cssselect import CSSSelector
 from base_scraper import BaseScraper
-from urllib.parse import urljoin, urlparse
+from scrapers._html import (
+    _CARD_AVAILABILITY_SEL, _CARD_BRAND_SEL, _CARD_IMG_XPATH, _CARD_LINK_XPATH, _DESC_SELS, _ORIGINAL_PRICE_SEL,
+    _all_strings, _card_selector, _element_text, _join_url, _parse_html_async, _parse_price, _select_first,
+    _stripped_strings
+)
+from urllib.parse import urlparse
 import aiohttp
 import config
 
 
+# Text fallbacks for card and product page prices, tried in order until one yields a valid price:
+# "1.234,56 EUR", then "EUR 1.234,56", then (product pages only) "price": 1234
+_CARD_PRICE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'([\d,]+\.?\d*)\s*EUR',
+    r'EUR\s*([\d,]+\.?\d*)',
+))
+_PAGE_PRICE_PATTERNS = _CARD_PRICE_PATTERNS + (re.compile(r'price["\']?\s*[:=]\s*([\d,]+\.?\d*)', re.IGNORECASE),)
+# Characters of joined text searched when no single text fragment matches a pattern; covers whole
+# product pages (under 100k characters of text) while bounding pathological ones
+_PRICE_TEXT_WINDOW = 200000
+
+# Product ID in a URL that the string checks in _extract_product_id_from_url cannot resolve;
+# the two /product/ forms share one prefix branch so it is only matched once per position
+_PRODUCT_ID_RE = re.compile(r'/product/(?:[^/]+/(\d+)$|(\d+))|/p/(\d+)|id=(\d+)')
+
+# Fully qualified <loc> tag in sitemap XML
+_SITEMAP_LOC_TAG = '{http://www.sitemaps.org/schemas/sitemap/0.9}loc'
+
+# Precompiled selectors for Public.cy pages
+_LINK_XPATH = etree.XPath('//a[@href]')
+_CARD_TITLE_SEL = _card_selector('h2, h3, h4, .product-title, .product__title, .product-name, [class*="title"]')
+_CARD_PRICE_SEL = _card_selector('.product__price--final, [class*="product__price"]')
+_CARD_ORIGINAL_PRICE_SEL = _card_selector(
+    '.product__price--initial, .original-price, .old-price, .product__price, [class*="original"], [class*="old"]'
+)
+_INITIAL_PRICE_SEL = CSSSelector('.product__price--initial')
+_FINAL_PRICE_SEL = CSSSelector('.product__price--final')
+_PRICE_SEL = CSSSelector('.product__price')
+_ANY_PRICE_SEL = CSSSelector('[class*="product__price"]')
+
+
 class PublicScraper(BaseScraper):
     """Scraper for Public Cyprus website."""
 
@@ -20,9 +59,9 @@ class PublicScraper(BaseScraper):
         )
         self.sitemap_url = "https://www.public.cy/sitemap/sitemap_public_categories.xml.gz"
         self.visited_urls: Set[str] = set()
-        self.category_queue: List[str] = []
-        self.category_filter: Optional[List[str]] = None
-        self.category_keywords: Dict[str, List[str]] = {}
+        self.category_queue: asyncio.Queue = asyncio.Queue()
+        # Mirrors category_queue for O(1) membership checks
+        self.queued_urls: Set[str] = set()
 
         # Fallback URLs if sitemap is not accessible
         self.fallback_category_urls = {
@@ -40,75 +79,108 @@ class PublicScraper(BaseScraper):
             ],
         }
 
-    def set_category_filter(self, categories: List[str], category_keywords: Dict[str, List[str]]):
-        """
-        Set category filter to limit scraping to specific categories.
-
-        Args:
-            categories: List of category names to scrape (e.g., ["smartphones", "laptops"])
-            category_keywords: Dict mapping category names to URL keywords to match
-        """
-        self.category_filter = categories
-        self.category_keywords = category_keywords
-        print(f"[INFO] Category filter set: {', '.join(categories)}")
-
-    def _matches_category_filter(self, url: str) -> bool:
-        """
-        Check if a URL matches the category filter.
-
-        Args:
-            url: URL to check
-
-        Returns:
-            True if URL matches filter (or no filter set), False otherwise
-        """
-        if not self.category_filter:
-            return True  # No filter, allow all
-
-        url_lower = url.lower()
-
-        # Check if URL contains any keywords for selected categories
-        for category in self.category_filter:
-            keywords = self.category_keywords.get(category, [])
-            for keyword in keywords:
-                if keyword in url_lower:
-                    return True
-
-        return False
-    
     def _extract_price(self, text: str) -> Optional[float]:
         """Extract price from text string."""
         if not text:
             return None
-        # Remove currency symbols and whitespace
-        text = text.replace('\u20ac', '').replace('EUR', '').replace(' ', '').strip()
-        
-        # Handle European format (1.234,56) vs US format (1,234.56)
-        # If there's a comma followed by 2 digits at the end, it's likely European format
-        if re.search(r',\d{2}$', text):
-            # European format: 1.234,56 -> 1234.56
-            text = text.replace('.', '').replace(',', '.')
-        else:
-            # US format or simple: 1234.56 or 1234,56 -> 1234.56
-            text = text.replace(',', '')
-        
-        # Extract number (including decimal)
-        price_match = re.search(r'(\d+\.?\d*)', text)
-        if price_match:
-            try:
-                price = float(price_match.group(1))
-                # Sanity check: prices should be reasonable (between 1 and 1,000,000)
-                if 1 <= price <= 1000000:
-                    return price
-            except ValueError:
-                pass
-        return None
+        return _parse_price(text)
+
+    def _extract_product_id_from_url(self, product_url: str) -> str:
+        """Extract a numeric product ID from a product URL, or '' if there is none."""
+        # Fast path for URLs with a single /product/ segment and no other ID markers;
+        # gives the same answer as the regex below without running it
+        start = product_url.find('/product/')
+        if (start != -1 and product_url.count('/product/') == 1
+                and '/p/' not in product_url and 'id=' not in product_url):
+            rest = product_url[start + len('/product/'):]
+            slug, sep, tail = rest.partition('/')
+            if slug and sep and tail.isdecimal():
+                return tail  # /product/<slug>/<id>
+            digits = len(rest) - len(rest.lstrip('0123456789'))
+            return rest[:digits]  # /product/<id>, or '' for deeper paths
+
+        # Public.cy format: /product/.../1234567
+        url_match = _PRODUCT_ID_RE.search(product_url)
+        if url_match:
+            return url_match.group(1) or url_match.group(2) or url_match.group(3) or url_match.group(4)
+        return ""
 
     def _extract_price_from_element(self, elem) -> Optional[float]:
-        """Extract price from a BeautifulSoup element if present."""
-        if not elem:
+        """Extract price from an lxml element if present."""
+        if elem is None:
             return None
-        return self._extract_price(elem.get_text(strip=True))
+        return self._extract_price(_element_text(elem))
+
+    def _find_text_price(self, elem, patterns: Tuple[re.Pattern, ...]) -> Optional[float]:
+        """First valid price in the text under elem, trying each pattern in turn."""
+        joined_text = None
+        for pattern in patterns:
+            # A single text fragment usually holds the whole price; like a search over the joined
+            # text, only the first match of the pattern is tried
+            match = None
+            for fragment in _stripped_strings(elem):
+                match = pattern.search(fragment)
+                if match:
+                    break
+            if match:
+                price = self._extract_price(match.group(1))
+                if price:
+                    return price
+
+            # Number and currency can also sit in sibling elements (<span>24</span><span>EUR</span>),
+            # which only the joined text matches
+            if joined_text is None:
+                parts = []
+                size = 0
+                for fragment in _all_strings(elem):
+                    parts.append(fragment)
+                    size += len(fragment)
+                    if size >= _PRICE_TEXT_WINDOW:
+                        break
+                joined_text = ''.join(parts)[:_PRICE_TEXT_WINDOW]
+            match = pattern.search(joined_text)
+            if match:
+                price = self._extract_price(match.group(1))
+                if price:
+                    return price
+        return None
+
+    async def _read_sitemap_locs(self, response: aiohttp.ClientResponse) -> List[str]:
+        """Stream a sitemap response body, gunzipping and parsing it chunk by chunk, and return its <loc> URLs."""
+        parser = ET.XMLPullParser(events=('end',))
+        decompressor = None
+        head = b''
+        loc_urls = []
+
+        def collect_locs():
+            for _, elem in parser.read_events():
+                if elem.tag == _SITEMAP_LOC_TAG and elem.text:
+                    loc_urls.append(elem.text)
+                elem.clear()
+
+        async for chunk in response.content.iter_chunked(131072):
+            if head is not None:
+                # Wait for the first two bytes to tell gzip (magic 1f 8b) from plain XML
+                head += chunk
+                if len(head) < 2:
+                    continue
+                chunk, head = head, None
+                if chunk[:2] == b'\x1f\x8b':
+                    decompressor = zlib.decompressobj(wbits=31)
+                else:
+                    print("[INFO] Sitemap is not gzipped, using raw content")
+            parser.feed(decompressor.decompress(chunk) if decompressor else chunk)
+            collect_locs()
+
+        if head:
+            parser.feed(head)
+        if decompressor:
+            parser.feed(decompressor.flush())
+            if not decompressor.eof:
+                raise EOFError("Compressed sitemap ended before the end-of-stream marker was reached")
+        parser.close()
+        collect_locs()
+        return loc_urls
 
     async def _fetch_sitemap_urls(self) -> List[str]:
         """Fetch and parse the sitemap XML.gz file to get all category URLs."""
@@ -116,31 +188,14 @@ class PublicScraper(BaseScraper):
 
         # First try with aiohttp (faster)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.sitemap_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    if response.status == 200:
-                        content = await response.read()
-
-                        # Try to decompress, if it fails it might not be gzipped
-                        try:
-                            decompressed = gzip.decompress(content)
-                        except gzip.BadGzipFile:
-                            print("[INFO] Sitemap is not gzipped, using raw content")
-                            decompressed = content
-
-                        # Parse XML
-                        root = ET.fromstring(decompressed)
-                        # XML namespace for sitemap
-                        ns = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-                        # Extract all <loc> elements
-                        for loc in root.findall('.//sm:loc', ns):
-                            url = loc.text
-                            if url:
-                                urls.append(url)
-                        print(f"[OK] Loaded {len(urls)} URLs from sitemap")
-                        return urls
-                    else:
-                        print(f"[WARNING] Sitemap fetch failed with status {response.status}, will try with browser")
+            session = await self._get_http_session()
+            async with session.get(self.sitemap_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status == 200:
+                    urls.extend(await self._read_sitemap_locs(response))
+                    print(f"[OK] Loaded {len(urls)} URLs from sitemap")
+                    return urls
+                else:
+                    print(f"[WARNING] Sitemap fetch failed with status {response.status}, will try with browser")
         except Exception as e:
             print(f"[WARNING] aiohttp sitemap fetch failed: {e}, will try with browser")
 
@@ -159,21 +214,15 @@ class PublicScraper(BaseScraper):
             response = await page.goto(self.sitemap_url, timeout=cfg.TIMEOUT, wait_until="domcontentloaded")
 
             if response and response.status == 200:
-                # Get the raw content
-                content = await page.content()
-
-                # The content will be wrapped in HTML, extract the text
-                soup = BeautifulSoup(content, 'lxml')
-                # Get text content (sitemap XML)
-                xml_text = soup.get_text()
+                # The XML is shown wrapped in an HTML page; read its text (the sitemap XML)
+                # straight from the DOM instead of serialising and re-parsing the page
+                xml_text = await page.evaluate("document.documentElement.textContent") or ""
 
                 # Try to parse as XML
                 try:
                     root = ET.fromstring(xml_text.encode('utf-8'))
-                    # XML namespace for sitemap
-                    ns = {'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
                     # Extract all <loc> elements
-                    for loc in root.findall('.//sm:loc', ns):
+                    for loc in root.iter(_SITEMAP_LOC_TAG):
                         url = loc.text
                         if url:
                             urls.append(url)
@@ -195,26 +244,30 @@ class PublicScraper(BaseScraper):
         """Parse a product card element into a product dictionary."""
         try:
             # Extract product link
-            link_elem = card_element.find('a', href=True)
-            if not link_elem:
+            link_elem = _select_first(_CARD_LINK_XPATH, card_element)
+            if link_elem is None:
                 return None
 
-            product_url = urljoin(base_url, link_elem['href'])
+            product_url = _join_url(base_url, link_elem.get('href'))
 
             # Filter out blocked URLs (checkout, cart, account pages)
             if not self._is_allowed_url(product_url):
                 return None
 
+            # Container text is read once; without any digit there can be no price in it
+            container_text = _element_text(card_element)
+            has_digit = any(ch.isdigit() for ch in container_text)
+
             # Extract product name - try multiple strategies
             name = ""
             # Strategy 1: Look for title elements
-            name_elem = card_element.select_one('h2, h3, h4, .product-title, .product__title, .product-name, [class*="title"]')
-            if name_elem:
-                name = name_elem.get_text(strip=True)
+            name_elem = _select_first(_CARD_TITLE_SEL, card_element)
+            if name_elem is not None:
+                name = _element_text(name_elem)
 
             # Strategy 2: Look for text in the link
             if not name:
-                name = link_elem.get_text(strip=True)
+                name = _element_text(link_elem)
 
             # Strategy 3: Extract from URL if it contains product name
             if not name or len(name) < 3:
@@ -228,7 +281,6 @@ class PublicScraper(BaseScraper):
 
             # Strategy 4: Look for any text in the container
             if not name or len(name) < 3:
-                container_text = card_element.get_text(strip=True)
                 # Take first meaningful line
                 lines = [l.strip() for l in container_text.split('\n') if l.strip() and len(l.strip()) > 3]
                 if lines:
@@ -236,54 +288,42 @@ class PublicScraper(BaseScraper):
 
             # Extract price - look in multiple places
             price = None
-            price_elem = card_element.select_one('.product__price--final, [class*="product__price"]')
-            price = self._extract_price_from_element(price_elem)
-            # If no price found, search in all text within container
-            if not price:
-                container_text = card_element.get_text()
-                price_patterns = [
-                    r'([\d,]+\.?\d*)\s*EUR',
-                    r'EUR\s*([\d,]+\.?\d*)'
-                ]
-                for pattern in price_patterns:
-                    match = re.search(pattern, container_text, re.IGNORECASE)
-                    if match:
-                        price = self._extract_price(match.group(1))
-                        if price:
-                            break
+            original_price = None
+            if has_digit:
+                price_elem = _select_first(_CARD_PRICE_SEL, card_element)
+                price = self._extract_price_from_element(price_elem)
+                # If no price found, search the text within container
+                if not price:
+                    price = self._find_text_price(card_element, _CARD_PRICE_PATTERNS)
 
-            # Extract original price (for discounts)
-            original_price_elem = card_element.select_one('.product__price--initial, .original-price, .old-price, .product__price, [class*="original"], [class*="old"]')
-            original_price = self._extract_price_from_element(original_price_elem)
+                # Extract original price (for discounts)
+                original_price_elem = _select_first(_CARD_ORIGINAL_PRICE_SEL, card_element)
+                original_price = self._extract_price_from_element(original_price_elem)
 
             # Calculate discount percentage
-            discount_percentage = None
-            if original_price and price:
-                discount_percentage = ((original_price - price) / original_price) * 100
+            discount_percentage = self._discount_pct(price, original_price)
 
             # Extract image
-            img_elem = card_element.find('img', src=True)
+            img_elem = _select_first(_CARD_IMG_XPATH, card_element)
             image_url = ""
-            if img_elem:
-                image_url = urljoin(base_url, img_elem.get('src', ''))
+            if img_elem is not None:
+                image_url = _join_url(base_url, img_elem.get('src', ''))
 
             # Extract product ID from URL or data attributes
             product_id = ""
-            if 'data-product-id' in card_element.attrs:
-                product_id = card_element['data-product-id']
-            elif 'data-id' in card_element.attrs:
-                product_id = card_element['data-id']
+            if 'data-product-id' in card_element.attrib:
+                product_id = card_element.get('data-product-id')
+            elif 'data-id' in card_element.attrib:
+                product_id = card_element.get('data-id')
             else:
-                # Try to extract from URL - Public.cy format: /product/.../1234567
-                url_match = re.search(r'/product/[^/]+/(\d+)$|/product/(\d+)|/p/(\d+)|id=(\d+)', product_url)
-                if url_match:
-                    product_id = url_match.group(1) or url_match.group(2) or url_match.group(3) or url_match.group(4)
+                # Try to extract from URL
+                product_id = self._extract_product_id_from_url(product_url)
 
             # Extract brand (often in name or separate element) - use select_one for CSS selectors
             brand = ""
-            brand_elem = card_element.select_one('.brand, [class*="brand"]')
-            if brand_elem:
-                brand = brand_elem.get_text(strip=True)
+            brand_elem = _select_first(_CARD_BRAND_SEL, card_element)
+            if brand_elem is not None:
+                brand = _element_text(brand_elem)
             else:
                 # Try to extract from name (first word often brand)
                 name_parts = name.split()
@@ -292,9 +332,9 @@ class PublicScraper(BaseScraper):
 
             # Availability
             availability = "unknown"
-            availability_elem = card_element.select_one('.availability, .stock, [class*="stock"], [class*="available"]')
-            if availability_elem:
-                availability_text = availability_elem.get_text(strip=True).lower()
+            availability_elem = _select_first(_CARD_AVAILABILITY_SEL, card_element)
+            if availability_elem is not None:
+                availability_text = _element_text(availability_elem).lower()
                 if 'out' in availability_text or 'unavailable' in availability_text:
                     availability = "out_of_stock"
                 elif 'in stock' in availability_text or 'available' in availability_text:
@@ -329,68 +369,55 @@ class PublicScraper(BaseScraper):
             print(f"[WARNING] Error parsing product card: {e}")
             return None
 
+    def _extract_prices_from_tree(self, tree) -> Tuple[Optional[float], Optional[float]]:
+        """Extract (price, original_price) from a parsed product page."""
+        original_price = self._extract_price_from_element(_select_first(_INITIAL_PRICE_SEL, tree))
+        price = self._extract_price_from_element(_select_first(_FINAL_PRICE_SEL, tree))
+
+        if not price:
+            price = self._extract_price_from_element(_select_first(_PRICE_SEL, tree))
+        # If still no price, search the page text
+        if not price:
+            price = self._find_text_price(tree, _PAGE_PRICE_PATTERNS)
+        return price, original_price
+
     async def _fetch_product_details(self, product_url: str) -> Optional[Dict]:
         """Fetch price and details from individual product page."""
         try:
-            html = await self._fetch_page(product_url)
+            # Product pages can be fetched over plain HTTP when HTTP_DETAIL_FETCH is on; the
+            # no-price-markup refetch below still goes through the browser
+            fetch = self._fetch_html if config.HTTP_DETAIL_FETCH else self._fetch_page
+            html = await fetch(product_url)
             if not html:
                 return None
 
-            soup = BeautifulSoup(html, 'lxml')
+            tree = await _parse_html_async(html)
+            if tree is None:
+                return None
 
-            # Extract price from product page
-            initial_elem = soup.select_one('.product__price--initial')
-            final_elem = soup.select_one('.product__price--final')
-            original_price = self._extract_price_from_element(initial_elem)
-            price = self._extract_price_from_element(final_elem)
+            price, original_price = self._extract_prices_from_tree(tree)
 
-            if not price:
-                price_elem = soup.select_one('.product__price')
-                price = self._extract_price_from_element(price_elem)
-            # If still no price, search in all text
-            if not price:
-                page_text = soup.get_text()
-                price_patterns = [
-                    r'([\d,]+\.?\d*)\s*EUR',
-                    r'EUR\s*([\d,]+\.?\d*)',
-                    r'price["\']?\s*[:=]\s*([\d,]+\.?\d*)',
-                ]
-                for pattern in price_patterns:
-                    match = re.search(pattern, page_text, re.IGNORECASE)
-                    if match:
-                        price = self._extract_price(match.group(1))
-                        if price and price > 0:  # Valid price
-                            break
-
-            # If no price found and cache might be stale, refetch once without cache
-            if not price:
+            # If the page has no price markup at all, the cached copy is likely stale or an
+            # anti-bot page, so refetch once without cache; pages with price markup but no
+            # parseable number would not improve on a refetch
+            if not price and not _ANY_PRICE_SEL(tree):
                 html = await self._fetch_page(product_url, use_cache=False)
-                if html:
-                    soup = BeautifulSoup(html, 'lxml')
-                    initial_elem = soup.select_one('.product__price--initial')
-                    final_elem = soup.select_one('.product__price--final')
-                    original_price = self._extract_price_from_element(initial_elem)
-                    price = self._extract_price_from_element(final_elem)
-                    if not price:
-                        price_elem = soup.select_one('.product__price')
-                        price = self._extract_price_from_element(price_elem)
-                    if not original_price:
-                        original_price_elem = soup.select_one('.original-price, .old-price, [class*="original-price"], [class*="old-price"]')
-                        original_price = self._extract_price_from_element(original_price_elem)
+                refetched_tree = await _parse_html_async(html) if html else None
+                if refetched_tree is not None:
+                    tree = refetched_tree
+                    price, original_price = self._extract_prices_from_tree(tree)
 
             # Extract description
             description = ""
-            desc_selectors = ['.description', '.product-description', '[class*="description"]', '[itemprop="description"]']
-            for selector in desc_selectors:
-                desc_elem = soup.select_one(selector)
-                if desc_elem:
-                    description = desc_elem.get_text(strip=True)[:1000]  # Limit length
+            for selector in _DESC_SELS:
+                desc_elem = _select_first(selector, tree)
+                if desc_elem is not None:
+                    description = ''.join(_stripped_strings(desc_elem))[:1000]  # Limit length
                     break
 
             # Extract original price for discounts (fallback if initial not found)
             if not original_price:
-                original_price_elem = soup.select_one('.original-price, .old-price, [class*="original-price"], [class*="old-price"]')
-                original_price = self._extract_price_from_element(original_price_elem)
+                original_price = self._extract_price_from_element(_select_first(_ORIGINAL_PRICE_SEL, tree))
 
             return {
                 "price": price,
@@ -412,12 +439,13 @@ class PublicScraper(BaseScraper):
         if not html:
             return discovered_urls
 
-        soup = BeautifulSoup(html, 'lxml')
-        all_links = soup.find_all('a', href=True)
+        tree = await _parse_html_async(html)
+        if tree is None:
+            return discovered_urls
 
-        for link in all_links:
+        for link in _LINK_XPATH(tree):
             href = link.get('href', '')
-            full_url = urljoin(self.base_url, href)
+            full_url = _join_url(self.base_url, href)
 
             # Look for sub-category links (/root/) or listing links (/cat/)
             if '/root/' in full_url or '/cat/' in full_url:
@@ -426,27 +454,33 @@ class PublicScraper(BaseScraper):
 
         return discovered_urls
 
-    async def _scrape_cat_listing_page(self, url: str, category_path: str = "") -> List[Dict]:
+    def _parse_listing_page(self, tree, url: str, category_path: str) -> Tuple[List[Dict], List[str]]:
         """
-        Scrape a /cat/ product listing page to extract all product links.
-        Returns a list of product dictionaries.
+        Parse a /cat/ listing page tree into its products and the unvisited pagination URLs.
+        Kept separate from the async crawl so pages are parsed in crawl order whatever order they load in.
         """
         products = []
 
-        html = await self._fetch_page(url)
-        if not html:
-            return products
-
-        soup = BeautifulSoup(html, 'lxml')
-
-        # Find all product links
-        all_links = soup.find_all('a', href=True)
-        product_links = [link for link in all_links if '/product/' in link.get('href', '')]
+        # Classify all links in one pass: product links, and pagination candidates
+        # ("Next" buttons or page numbers) that are checked against visited URLs later
+        all_links = _LINK_XPATH(tree)
+        product_links = []
+        page_candidates = []
+        listing_base = url.split('?')[0]
+        for link in all_links:
+            href = link.get('href', '')
+            if '/product/' in href:
+                product_links.append(link)
+            href_lower = href.lower()
+            if 'page=' in href_lower or '/page/' in href_lower or _element_text(link).lower() in ['next', 'ÎµÏ€ÏŒÎ¼ÎµÎ½Î¿', 'â€º', 'Â»']:
+                page_url = _join_url(self.base_url, href)
+                if page_url.startswith(listing_base):
+                    page_candidates.append(page_url)
 
         print(f"  Found {len(product_links)} product links on {url}")
 
         for link in product_links:
-            product_url = urljoin(self.base_url, link['href'])
+            product_url = _join_url(self.base_url, link.get('href'))
 
             # Skip if already processed or not allowed
             if product_url in self.visited_urls or not self._is_allowed_url(product_url):
@@ -454,44 +488,67 @@ class PublicScraper(BaseScraper):
 
             self.visited_urls.add(product_url)
 
-            # Try to parse product card from container
-            container = link.parent
+            # Try to parse product card from the parent, then grandparent, then great-grandparent
             product = None
-
-            # Try parent
-            if container:
+            for container in islice(link.iterancestors(), 3):
                 product = self._parse_product_card(container, self.base_url)
-
-            # Try grandparent if parent didn't work
-            if not product and container and container.parent:
-                product = self._parse_product_card(container.parent, self.base_url)
-
-            # Try great-grandparent if still no product
-            if not product and container and container.parent and container.parent.parent:
-                product = self._parse_product_card(container.parent.parent, self.base_url)
+                if product:
+                    break
 
             if product:
                 product["category"] = category_path
                 products.append(product)
 
-        # Look for pagination - "Next" buttons or page numbers
-        pagination_links = []
-        for link in all_links:
-            href = link.get('href', '').lower()
-            link_text = link.get_text(strip=True).lower()
-
-            # Look for pagination patterns
-            if 'page=' in href or '/page/' in href or link_text in ['next', 'ÎµÏ€ÏŒÎ¼ÎµÎ½Î¿', 'â€º', 'Â»']:
-                page_url = urljoin(self.base_url, link['href'])
-                if page_url not in self.visited_urls and page_url.startswith(url.split('?')[0]):
-                    pagination_links.append(page_url)
-
-        # Process pagination pages recursively
-        for page_url in pagination_links[:5]:  # Limit to 5 additional pages per listing
-            if page_url not in self.visited_urls:
-                self.visited_urls.add(page_url)
-                page_products = await self._scrape_cat_listing_page(page_url, category_path)
-                products.extend(page_products)
+        # Pagination links not already visited (product URLs were just marked as visited)
+        pagination_links = [page_url for page_url in page_candidates if page_url not in self.visited_urls]
+
+        return products, pagination_links
+
+    async def _fetch_listing_tree(self, url: str):
+        """Fetch and parse a single /cat/ listing page, or return None if it could not be loaded."""
+        html = await self._fetch_page(url)
+        if not html:
+            return None
+        # Only the HTML parse runs off the event loop; extraction updates visited_urls, so it runs in crawl order
+        return await _parse_html_async(html)
+
+    async def _scrape_cat_listing_page(self, url: str, category_path: str = "") -> List[Dict]:
+        """
+        Scrape a /cat/ product listing page and its pagination pages to extract all product links.
+        Pages are visited depth-first in the recursive crawl's order, so the same pages are reached;
+        the pagination pages found on a page are fetched concurrently before they are visited.
+        Returns a list of product dictionaries.
+        """
+        products = []
+        fetches: Dict[str, asyncio.Task] = {}
+
+        async def visit(page_url: str) -> List[str]:
+            tree = await fetches[page_url]
+            if tree is None:
+                return []
+            page_products, pagination_links = self._parse_listing_page(tree, page_url, category_path)
+            products.extend(page_products)
+            pagination_links = pagination_links[:5]  # Limit to 5 additional pages per listing
+            for link in pagination_links:
+                if link not in fetches:
+                    fetches[link] = asyncio.create_task(self._fetch_listing_tree(link))
+            return pagination_links
+
+        fetches[url] = asyncio.create_task(self._fetch_listing_tree(url))
+        try:
+            # Explicit stack of pagination iterators in place of recursion
+            stack = [iter(await visit(url))]
+            while stack:
+                page_url = next(stack[-1], None)
+                if page_url is None:
+                    stack.pop()
+                elif page_url not in self.visited_urls:
+                    self.visited_urls.add(page_url)
+                    stack.append(iter(await visit(page_url)))
+        finally:
+            # Cancel prefetches that were never visited (reached first by another branch, or the crawl failed)
+            for task in fetches.values():
+                task.cancel()
 
         return products
     
@@ -517,15 +574,18 @@ class PublicScraper(BaseScraper):
         if self.category_filter:
             print(f"Category Filter: {', '.join(self.category_filter)}")
 
-        await self._check_robots_txt()
-
-        # Initialize browser early if not in preview mode (needed for sitemap fetch)
-        if not preview_mode:
-            await self.init_browser()
-
         all_products = []
+        seen_product_urls: Set[str] = set()
 
         try:
+            # Initialize browser early if not in preview mode (needed for sitemap fetch),
+            # overlapping its start-up with the robots.txt request; inside the try so a failed
+            # start-up still closes the HTTP session opened for robots.txt
+            if preview_mode:
+                await self._check_robots_txt()
+            else:
+                await asyncio.gather(self._check_robots_txt(), self.init_browser())
+
             # Step 1: Fetch sitemap URLs
             print("Step 1: Fetching sitemap...")
             sitemap_urls = await self._fetch_sitemap_urls()
@@ -537,13 +597,13 @@ class PublicScraper(BaseScraper):
                 if not preview_mode:
                     homepage_html = await self._fetch_page(self.base_url)
                     if homepage_html:
-                        soup = BeautifulSoup(homepage_html, 'lxml')
-                        all_links = soup.find_all('a', href=True)
+                        homepage_tree = await _parse_html_async(homepage_html)
+                        all_links = _LINK_XPATH(homepage_tree) if homepage_tree is not None else []
 
                         discovered_urls = []
                         for link in all_links:
                             href = link.get('href', '')
-                            full_url = urljoin(self.base_url, href)
+                            full_url = _join_url(self.base_url, href)
 
                             # Look for product category links and product pages
                             url_lower = full_url.lower()
@@ -551,12 +611,8 @@ class PublicScraper(BaseScraper):
                                 discovered_urls.append(full_url)
 
                             # Also look for category keywords in URLs
-                            if self.category_filter:
-                                for category in self.category_filter:
-                                    keywords = self.category_keywords.get(category, [])
-                                    for keyword in keywords:
-                                        if keyword in url_lower:
-                                            discovered_urls.append(full_url)
+                            if self.category_filter and self._matches_category_filter(full_url):
+                                discovered_urls.append(full_url)
 
                         sitemap_urls = list(set(discovered_urls))
                         print(f"  Discovered {len(sitemap_urls)} URLs from homepage")
@@ -575,8 +631,14 @@ class PublicScraper(BaseScraper):
 
             # Step 2: Filter and organize URLs
             print("\nStep 2: Organizing and filtering URLs...")
-            root_urls = [url for url in sitemap_urls if '/root/' in url]
-            cat_urls = [url for url in sitemap_urls if '/cat/' in url]
+            # Single pass over the sitemap; a URL containing both markers lands in both lists
+            root_urls = []
+            cat_urls = []
+            for url in sitemap_urls:
+                if '/root/' in url:
+                    root_urls.append(url)
+                if '/cat/' in url:
+                    cat_urls.append(url)
 
             print(f"  Found {len(root_urls)} /root/ category pages (before filter)")
             print(f"  Found {len(cat_urls)} /cat/ listing pages (before filter)")
@@ -615,34 +677,48 @@ class PublicScraper(BaseScraper):
                 print(f"  - {len(cat_urls)} /cat/ pages match")
 
             # Step 3: Initialize queue with /root/ and /cat/ URLs
-            self.category_queue = root_urls[:50]  # Start with first 50 root categories
-            self.category_queue.extend(cat_urls[:100])  # Add first 100 listing pages
+            initial_urls = root_urls[:50] + cat_urls[:100]  # First 50 root categories, first 100 listing pages
+            self.category_queue = asyncio.Queue()
+            for url in initial_urls:
+                self.category_queue.put_nowait(url)
+            self.queued_urls = set(initial_urls)
 
-            print(f"\nStep 3: Processing {len(self.category_queue)} URLs from queue...")
+            print(f"\nStep 3: Processing {len(initial_urls)} URLs from queue...")
 
             if preview_mode:
                 print("\n[PREVIEW MODE] - Showing URLs that would be scraped:")
-                for i, url in enumerate(self.category_queue[:20], 1):
+                for i, url in enumerate(initial_urls[:20], 1):
                     url_type = "/root/" if "/root/" in url else "/cat/"
                     print(f"  {i}. [{url_type}] {url}")
-                if len(self.category_queue) > 20:
-                    print(f"  ... and {len(self.category_queue) - 20} more URLs")
-                return self.category_queue  # Return URLs as "products" for preview
+                if len(initial_urls) > 20:
+                    print(f"  ... and {len(initial_urls) - 20} more URLs")
+                return initial_urls  # Return URLs as "products" for preview
 
-            # Step 4: Process queue
+            # Step 4: Process queue with MAX_CONCURRENCY workers sharing it
             processed_count = 0
             max_urls_to_process = 200  # Limit to prevent excessive scraping
+            limit_reported = False
 
-            while self.category_queue and processed_count < max_urls_to_process:
-                url = self.category_queue.pop(0)
+            async def process_url(url: str):
+                nonlocal processed_count, limit_reported
+                # Once a limit is hit, remaining queue entries are drained without processing
+                if processed_count >= max_urls_to_process:
+                    return
+                if self._product_limit_reached(all_products):
+                    if not limit_reported:
+                        limit_reported = True
+                        print(f"\n[INFO] Reached product limit ({config.MAX_PRODUCTS}), stopping crawl")
+                    return
+
+                self.queued_urls.discard(url)
 
                 # Skip if already visited
                 if url in self.visited_urls:
-                    continue
+                    return
 
                 # Skip if doesn't match category filter
                 if not self._matches_category_filter(url):
-                    continue
+                    return
 
                 self.visited_urls.add(url)
                 processed_count += 1
@@ -658,9 +734,10 @@ class PublicScraper(BaseScraper):
                     # Add discovered URLs to queue (if they match filter)
                     for new_url in discovered_urls:
                         if (new_url not in self.visited_urls and
-                            new_url not in self.category_queue and
+                            new_url not in self.queued_urls and
                             self._matches_category_filter(new_url)):
-                            self.category_queue.append(new_url)
+                            self.category_queue.put_nowait(new_url)
+                            self.queued_urls.add(new_url)
 
                 elif '/cat/' in url:
                     # Product listing page - extract products
@@ -675,11 +752,32 @@ class PublicScraper(BaseScraper):
 
                     # Add products to collection (avoid duplicates by URL)
                     for product in products:
-                        if not any(p["url"] == product["url"] for p in all_products):
+                        if self._product_limit_reached(all_products):
+                            break
+                        if product["url"] not in seen_product_urls:
+                            seen_product_urls.add(product["url"])
                             all_products.append(product)
 
                 print(f"  Total products so far: {len(all_products)}")
 
+            async def queue_worker():
+                while True:
+                    url = await self.category_queue.get()
+                    try:
+                        await process_url(url)
+                    except Exception as e:
+                        print(f"[WARNING] Error processing {url}: {e}")
+                    finally:
+                        self.category_queue.task_done()
+
+            workers = [asyncio.create_task(queue_worker()) for _ in range(max(1, config.MAX_CONCURRENCY))]
+            try:
+                await self.category_queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
             # Step 5: Fetch prices for products without prices
             print(f"\n\nStep 5: Fetching missing product prices...")
             products_to_update = [p for p in all_products if p.get("price", 0) == 0]
@@ -688,15 +786,18 @@ class PublicScraper(BaseScraper):
             max_detail_fetch = config.MAX_PRODUCT_DETAIL_FETCH
             if max_detail_fetch <= 0:
                 max_detail_fetch = len(products_to_update)
-            for i, product in enumerate(products_to_update[:max_detail_fetch], 1):
-                print(f"  [{i}/{min(max_detail_fetch, len(products_to_update))}] Fetching price for: {product['name'][:50]}...")
-                details = await self._fetch_product_details(product["url"])
+            products_to_fetch = products_to_update[:max_detail_fetch]
+            print(f"  Fetching {len(products_to_fetch)} product pages, up to {config.MAX_CONCURRENCY} at a time...")
+            all_details = await self._run_bounded(
+                lambda product: self._fetch_product_details(product["url"]), products_to_fetch
+            )
+            for i, (product, details) in enumerate(zip(products_to_fetch, all_details), 1):
+                print(f"  [{i}/{len(products_to_fetch)}] Price for: {product['name'][:50]}...")
                 if details and details.get("price"):
                     product["price"] = details["price"]
                     if details.get("original_price"):
                         product["original_price"] = details["original_price"]
-                        if product["price"] and product["original_price"]:
-                            product["discount_percentage"] = ((product["original_price"] - product["price"]) / product["original_price"]) * 100
+                        product["discount_percentage"] = self._discount_pct(product["price"], product["original_price"])
                     if details.get("description"):
                         product["description"] = details["description"]
                     print(f"      [OK] Price: {product['price']} EUR")
@@ -714,8 +815,13 @@ class PublicScraper(BaseScraper):
         finally:
             if not preview_mode:
                 await self.close_browser()
+            else:
+                await self._close_http_session()
 
-        return [self.normalize_product(p) for p in all_products]
+        # Normalize in place so each raw product dict can be freed as soon as it is replaced
+        for i, product in enumerate(all_products):
+            all_products[i] = self.normalize_product(product)
+        return all_products
 
 
 
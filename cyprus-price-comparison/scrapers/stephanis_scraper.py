@@ -1,12 +1,61 @@
 """Scraper for Stephanis (stephanis.com.cy)."""
 import re
-from typing import Dict, List, Optional
-from bs4 import BeautifulSoup
+import asyncio
+from itertools import islice
+from typing import Dict, List, Optional, Set
+from lxml import etree
+from lxml.cssselect import CSSSelector
 from base_scraper import BaseScraper
+from scrapers._html import (
+    _CARD_AVAILABILITY_SEL, _CARD_BRAND_SEL, _CARD_IMG_XPATH, _CARD_LINK_XPATH, _DESC_SELS, _ORIGINAL_PRICE_SEL,
+    _all_strings, _card_selector, _element_text, _join_url, _parse_html_async, _parse_price, _select_first
+)
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
 import config
 
 
+# Category keywords looked for in main-page links, matched in a single scan per href
+_CATEGORY_KEYWORD_RE = re.compile(
+    r'information-technology|telecommunications|laptops|smartphones|televisions'
+    r'|gaming|tablets|phones|computers|mobile'
+)
+
+# Page number in a category pagination link
+_PAGE_PARAM_RE = re.compile(r'page=(\d+)')
+
+# Product page text fallbacks, tried in order until one yields a valid price
+# Each pattern is paired with the literal it cannot match without; checking for the literal first
+# skips the digit-run backtracking scan over pages that lack it
+_PAGE_PRICE_PATTERNS = tuple((re.compile(marker, re.IGNORECASE), re.compile(pattern, re.IGNORECASE)) for marker, pattern in (
+    ('€', r'€\s*([\d,]+\.?\d*)'),
+    ('€', r'([\d,]+\.?\d*)\s*€'),
+    ('EUR', r'EUR\s*([\d,]+\.?\d*)'),
+    ('EUR', r'([\d,]+\.?\d*)\s*EUR'),
+    ('price', r'price["\']?\s*[:=]\s*([\d,]+\.?\d*)'),
+))
+
+# Precompiled selectors for Stephanis pages
+_PAGINATION_LINK_SEL = CSSSelector('a[href*="page="]')
+_CARD_PRODUCT_ID_XPATH = etree.XPath('descendant::*[@data-productid]')
+# Stephanis card layout, matched case-insensitively on the class attribute in one XPath each:
+# name in <li class="spotlight-list-text tile-product-name">, price in <div class="listing-details-heading large-now-price">
+_LOWER_CLASS = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_CARD_NAME_XPATH = etree.XPath(
+    f"descendant::*[self::li or self::h2 or self::h3 or self::h4][contains({_LOWER_CLASS}, 'product-name')][1]")
+_CARD_PRICE_DIV_XPATH = etree.XPath(f"descendant::div[contains({_LOWER_CLASS}, 'price')][1]")
+# Candidate product links: the case-insensitive '/products/' test runs inside libxml2
+_PRODUCT_LINK_XPATH = etree.XPath(
+    "//a[contains(translate(@href, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '/products/')]")
+_CARD_HEADING_SEL = _card_selector('h2, h3, h4, .product-title, .product-name')
+_CARD_PRICE_SEL = _card_selector('.price, .product-price, [class*="price"], [data-price]')
+_CARD_ORIGINAL_PRICE_SEL = _card_selector('.original-price, .old-price, [class*="original"], [class*="old"]')
+_DETAIL_PRICE_SELS = [CSSSelector(sel) for sel in (
+    '.price', '.product-price', '[class*="price"]', '[data-price]',
+    '[class*="Price"]', '.current-price', '.sale-price',
+    '[itemprop="price"]', '.price-value'
+)]
+
+
 class StephanisScraper(BaseScraper):
     """Scraper for Stephanis website."""
 
@@ -21,83 +70,23 @@ class StephanisScraper(BaseScraper):
             "laptops",
             "gaming"
         ]
-        self.category_filter: Optional[List[str]] = None
-        self.category_keywords: Dict[str, List[str]] = {}
-
-    def set_category_filter(self, categories: List[str], category_keywords: Dict[str, List[str]]):
-        """
-        Set category filter to limit scraping to specific categories.
-
-        Args:
-            categories: List of category names to scrape (e.g., ["smartphones", "laptops"])
-            category_keywords: Dict mapping category names to URL keywords to match
-        """
-        self.category_filter = categories
-        self.category_keywords = category_keywords
-        print(f"[INFO] Stephanis category filter set: {', '.join(categories)}")
-
-    def _matches_category_filter(self, url: str) -> bool:
-        """
-        Check if a URL matches the category filter.
-
-        Args:
-            url: URL to check
-
-        Returns:
-            True if URL matches filter (or no filter set), False otherwise
-        """
-        if not self.category_filter:
-            return True  # No filter, allow all
-
-        url_lower = url.lower()
-
-        # Check if URL contains any keywords for selected categories
-        for category in self.category_filter:
-            keywords = self.category_keywords.get(category, [])
-            for keyword in keywords:
-                if keyword in url_lower:
-                    return True
 
-        return False
-    
     def _extract_price(self, text: str) -> Optional[float]:
         """Extract price from text string."""
         if not text:
             return None
-        # Remove currency symbols and whitespace
-        text = text.replace('€', '').replace('EUR', '').replace(' ', '').strip()
-        
-        # Handle European format (1.234,56) vs US format (1,234.56)
-        # If there's a comma followed by 2 digits at the end, it's likely European format
-        if re.search(r',\d{2}$', text):
-            # European format: 1.234,56 -> 1234.56
-            text = text.replace('.', '').replace(',', '.')
-        else:
-            # US format or simple: 1234.56 or 1234,56 -> 1234.56
-            text = text.replace(',', '')
-        
-        # Extract number (including decimal)
-        price_match = re.search(r'(\d+\.?\d*)', text)
-        if price_match:
-            try:
-                price = float(price_match.group(1))
-                # Sanity check: prices should be reasonable (between 1 and 1,000,000)
-                if 1 <= price <= 1000000:
-                    return price
-            except ValueError:
-                pass
-        return None
-
-    def _build_paginated_urls(self, base_url: str, soup: BeautifulSoup) -> List[str]:
-        """Build a list of paginated URLs from a category page."""
+        return _parse_price(text)
+
+    def _build_paginated_urls(self, base_url: str, tree) -> List[str]:
+        """Build a list of paginated URLs from a parsed category page."""
         page_numbers: List[int] = []
         pagination_hrefs: List[str] = []
 
-        for link in soup.select('a[href*="page="]'):
+        for link in _PAGINATION_LINK_SEL(tree):
             href = link.get('href')
             if not href:
                 continue
-            match = re.search(r'page=(\d+)', href)
+            match = _PAGE_PARAM_RE.search(href)
             if match:
                 page_numbers.append(int(match.group(1)))
                 pagination_hrefs.append(href)
@@ -117,34 +106,44 @@ class StephanisScraper(BaseScraper):
         parsed = urlparse(urljoin(base_url, sample_href))
         query = parse_qs(parsed.query)
 
+        # Encode the parameters around "page" once and splice each page number in between;
+        # a missing "page" is appended last, as assigning it to the dict would do
+        query.setdefault("page", [])
+        keys = list(query)
+        page_index = keys.index("page")
+        query_before = urlencode({key: query[key] for key in keys[:page_index]}, doseq=True)
+        query_after = urlencode({key: query[key] for key in keys[page_index + 1:]}, doseq=True)
+
         paged_urls = [base_url]
         for page_num in range(2, max_page + 1):
-            query["page"] = [str(page_num)]
-            paged_query = urlencode(query, doseq=True)
+            paged_query = '&'.join(part for part in (query_before, f"page={page_num}", query_after) if part)
             paged = parsed._replace(query=paged_query)
             paged_urls.append(urlunparse(paged))
 
         return paged_urls
 
-    def _extract_products_from_soup(self, soup: BeautifulSoup, base_url: str) -> List[Dict]:
-        """Extract products from a listing page soup."""
+    def _extract_products_from_tree(self, tree, base_url: str) -> List[Dict]:
+        """Extract products from a parsed listing page."""
         products: List[Dict] = []
-        all_links = soup.find_all('a', href=True)
-
-        for link in all_links:
-            href = link.get('href', '').lower()
-            if '/products/' in href and href.split('/')[-1].isdigit():
-                container = link.parent
+        seen_urls: Set[str] = set()
+        # Links in the same card share ancestors; a container always parses to the same result,
+        # so each one is parsed once. Keeping the elements as keys also keeps their lxml proxies alive.
+        card_results: Dict[object, Optional[Dict]] = {}
+
+        for link in _PRODUCT_LINK_XPATH(tree):
+            if link.get('href').rpartition('/')[2].isdigit():
+                # Try the parent, then grandparent, then great-grandparent as the card
                 product = None
+                for container in islice(link.iterancestors(), 3):
+                    if container in card_results:
+                        product = card_results[container]
+                    else:
+                        product = card_results[container] = self._parse_product_card(container, base_url)
+                    if product:
+                        break
 
-                if container:
-                    product = self._parse_product_card(container, base_url)
-                if not product and container and container.parent:
-                    product = self._parse_product_card(container.parent, base_url)
-                if not product and container and container.parent and container.parent.parent:
-                    product = self._parse_product_card(container.parent.parent, base_url)
-
-                if product and not any(p["url"] == product["url"] for p in products):
+                if product and product["url"] not in seen_urls:
+                    seen_urls.add(product["url"])
                     products.append(product)
 
         return products
@@ -153,86 +152,86 @@ class StephanisScraper(BaseScraper):
         """Parse a product card element into a product dictionary."""
         try:
             # Extract product link
-            link_elem = card_element.find('a', href=True)
-            if not link_elem:
+            link_elem = _select_first(_CARD_LINK_XPATH, card_element)
+            if link_elem is None:
                 return None
 
-            product_url = urljoin(base_url, link_elem['href'])
+            product_url = _join_url(base_url, link_elem.get('href'))
 
             # Filter out blocked URLs (checkout, cart, account pages)
             if not self._is_allowed_url(product_url):
                 return None
 
             # Stephanis specific: Check if this is a valid product URL (ends with number)
-            if not product_url.split('/')[-1].isdigit():
+            url_tail = product_url.rpartition('/')[2]
+            if not url_tail.isdigit():
                 return None
 
             # Extract product name - Stephanis uses <li class="spotlight-list-text tile-product-name">
-            name_elem = card_element.find(['li', 'h2', 'h3', 'h4'], class_=lambda x: x and ('product-name' in str(x).lower() or 'tile-product-name' in str(x).lower()))
-            if not name_elem:
-                name_elem = card_element.find(['h2', 'h3', 'h4', '.product-title', '.product-name'])
-            if not name_elem:
+            name_elem = _select_first(_CARD_NAME_XPATH, card_element)
+            if name_elem is None:
+                name_elem = _select_first(_CARD_HEADING_SEL, card_element)
+            if name_elem is None:
                 name_elem = link_elem
-            name = name_elem.get_text(strip=True) if name_elem else ""
+            name = _element_text(name_elem)
+            if not name:
+                return None
 
             # Extract price - Stephanis uses div class="listing-details-heading large-now-price"
-            price_elem = card_element.find('div', class_=lambda x: x and ('now-price' in str(x).lower() or 'price' in str(x).lower()))
-            if not price_elem:
-                # Use select_one for CSS selectors
-                price_elem = card_element.select_one('.price, .product-price, [class*="price"], [data-price]')
-            price_text = price_elem.get_text(strip=True) if price_elem else ""
+            price_elem = _select_first(_CARD_PRICE_DIV_XPATH, card_element)
+            if price_elem is None:
+                price_elem = _select_first(_CARD_PRICE_SEL, card_element)
+            price_text = _element_text(price_elem) if price_elem is not None else ""
             price = self._extract_price(price_text)
+            if not price:
+                return None
 
-            # Extract original price (for discounts) - use select_one for CSS selectors
-            original_price_elem = card_element.select_one('.original-price, .old-price, [class*="original"], [class*="old"]')
+            # Extract original price (for discounts)
+            original_price_elem = _select_first(_CARD_ORIGINAL_PRICE_SEL, card_element)
             original_price = None
-            if original_price_elem:
-                original_price_text = original_price_elem.get_text(strip=True)
+            if original_price_elem is not None:
+                original_price_text = _element_text(original_price_elem)
                 original_price = self._extract_price(original_price_text)
             
             # Calculate discount percentage
-            discount_percentage = None
-            if original_price and price:
-                discount_percentage = ((original_price - price) / original_price) * 100
+            discount_percentage = self._discount_pct(price, original_price)
             
             # Extract image
-            img_elem = card_element.find('img', src=True)
+            img_elem = _select_first(_CARD_IMG_XPATH, card_element)
             image_url = ""
-            if img_elem:
-                image_url = urljoin(base_url, img_elem.get('src', ''))
+            if img_elem is not None:
+                image_url = _join_url(base_url, img_elem.get('src', ''))
             
             # Extract product ID from URL or data attributes
             product_id = ""
             # Check data-productid attribute on any child element
-            product_id_elem = card_element.find(attrs={'data-productid': True})
-            if product_id_elem:
+            product_id_elem = _select_first(_CARD_PRODUCT_ID_XPATH, card_element)
+            if product_id_elem is not None:
                 product_id = product_id_elem.get('data-productid', '')
-            elif 'data-product-id' in card_element.attrs:
-                product_id = card_element['data-product-id']
-            elif 'data-id' in card_element.attrs:
-                product_id = card_element['data-id']
+            elif card_element.get('data-product-id') is not None:
+                product_id = card_element.get('data-product-id')
+            elif card_element.get('data-id') is not None:
+                product_id = card_element.get('data-id')
             else:
-                # Try to extract from URL - Stephanis uses /products/.../PRODUCTID
-                url_parts = product_url.split('/')
-                if url_parts[-1].isdigit():
-                    product_id = url_parts[-1]
+                # From the URL - Stephanis uses /products/.../PRODUCTID, checked above
+                product_id = url_tail
             
-            # Extract brand (often in name or separate element) - use select_one for CSS selectors
+            # Extract brand (often in name or separate element)
             brand = ""
-            brand_elem = card_element.select_one('.brand, [class*="brand"]')
-            if brand_elem:
-                brand = brand_elem.get_text(strip=True)
+            brand_elem = _select_first(_CARD_BRAND_SEL, card_element)
+            if brand_elem is not None:
+                brand = _element_text(brand_elem)
             else:
                 # Try to extract from name (first word often brand)
                 name_parts = name.split()
                 if name_parts:
                     brand = name_parts[0]
 
-            # Availability - use select_one for CSS selectors
+            # Availability
             availability = "unknown"
-            availability_elem = card_element.select_one('.availability, .stock, [class*="stock"], [class*="available"]')
-            if availability_elem:
-                availability_text = availability_elem.get_text(strip=True).lower()
+            availability_elem = _select_first(_CARD_AVAILABILITY_SEL, card_element)
+            if availability_elem is not None:
+                availability_text = _element_text(availability_elem).lower()
                 if 'out' in availability_text or 'unavailable' in availability_text:
                     availability = "out_of_stock"
                 elif 'in stock' in availability_text or 'available' in availability_text:
@@ -240,9 +239,6 @@ class StephanisScraper(BaseScraper):
                 elif 'pre-order' in availability_text or 'preorder' in availability_text:
                     availability = "pre_order"
             
-            if not name or not price:
-                return None
-            
             return {
                 "id": product_id or product_url,
                 "url": product_url,
@@ -269,36 +265,27 @@ class StephanisScraper(BaseScraper):
             if not html:
                 return None
             
-            soup = BeautifulSoup(html, 'lxml')
+            tree = await _parse_html_async(html)
+            if tree is None:
+                return None
             
             # Extract price from product page
             price = None
-            price_selectors = [
-                '.price', '.product-price', '[class*="price"]', '[data-price]',
-                '[class*="Price"]', '.current-price', '.sale-price',
-                '[itemprop="price"]', '.price-value'
-            ]
-            
-            for selector in price_selectors:
-                price_elem = soup.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
+            for selector in _DETAIL_PRICE_SELS:
+                price_elem = _select_first(selector, tree)
+                if price_elem is not None:
+                    price_text = _element_text(price_elem)
                     price = self._extract_price(price_text)
                     if price:
                         break
             
             # If still no price, search in all text
             if not price:
-                page_text = soup.get_text()
-                price_patterns = [
-                    r'€\s*([\d,]+\.?\d*)',
-                    r'([\d,]+\.?\d*)\s*€',
-                    r'EUR\s*([\d,]+\.?\d*)',
-                    r'([\d,]+\.?\d*)\s*EUR',
-                    r'price["\']?\s*[:=]\s*([\d,]+\.?\d*)',
-                ]
-                for pattern in price_patterns:
-                    match = re.search(pattern, page_text, re.IGNORECASE)
+                page_text = ''.join(_all_strings(tree))
+                for marker, pattern in _PAGE_PRICE_PATTERNS:
+                    if not marker.search(page_text):
+                        continue
+                    match = pattern.search(page_text)
                     if match:
                         price = self._extract_price(match.group(1))
                         if price and price > 0:  # Valid price
@@ -306,18 +293,17 @@ class StephanisScraper(BaseScraper):
             
             # Extract description
             description = ""
-            desc_selectors = ['.description', '.product-description', '[class*="description"]', '[itemprop="description"]']
-            for selector in desc_selectors:
-                desc_elem = soup.select_one(selector)
-                if desc_elem:
-                    description = desc_elem.get_text(strip=True)[:1000]  # Limit length
+            for selector in _DESC_SELS:
+                desc_elem = _select_first(selector, tree)
+                if desc_elem is not None:
+                    description = _element_text(desc_elem)[:1000]  # Limit length
                     break
             
             # Extract original price for discounts
             original_price = None
-            original_price_elem = soup.select_one('.original-price, .old-price, [class*="original-price"], [class*="old-price"]')
-            if original_price_elem:
-                original_price_text = original_price_elem.get_text(strip=True)
+            original_price_elem = _select_first(_ORIGINAL_PRICE_SEL, tree)
+            if original_price_elem is not None:
+                original_price_text = _element_text(original_price_elem)
                 original_price = self._extract_price(original_price_text)
             
             return {
@@ -332,6 +318,7 @@ class StephanisScraper(BaseScraper):
     async def _scrape_category(self, category: str) -> List[Dict]:
         """Scrape products from a category page."""
         products = []
+        seen_urls: Set[str] = set()
         
         # Try common category URL patterns
         category_urls = [
@@ -342,24 +329,32 @@ class StephanisScraper(BaseScraper):
             urljoin(self.base_url, f"/el/{category}"),  # Greek language prefix
         ]
         
-        for category_url in category_urls:
-            html = await self._fetch_page(category_url)
-            if html:
-                soup = BeautifulSoup(html, 'lxml')
-
-                paged_urls = self._build_paginated_urls(category_url, soup)
+        # Probe all candidate URLs at once; they are still tried in order below
+        candidate_htmls = await self._run_bounded(self._fetch_page, category_urls)
+        for category_url, html in zip(category_urls, candidate_htmls):
+            tree = await _parse_html_async(html) if html else None
+            if tree is not None:
+                paged_urls = self._build_paginated_urls(category_url, tree)
                 print(f"  Found {len(paged_urls)} page(s) for category listing")
 
+                # Fetch the other pagination pages concurrently, then extract them in page order
+                other_urls = [page_url for page_url in paged_urls if page_url != category_url]
+                page_htmls = dict(zip(other_urls, await self._run_bounded(self._fetch_page, other_urls)))
+
                 for page_url in paged_urls:
                     print(f"  Fetching page: {page_url}")
-                    page_html = html if page_url == category_url else await self._fetch_page(page_url)
-                    if not page_html:
-                        continue
-                    page_soup = BeautifulSoup(page_html, 'lxml')
-                    page_products = self._extract_products_from_soup(page_soup, self.base_url)
+                    if page_url == category_url:
+                        page_tree = tree  # First page is already parsed
+                    else:
+                        page_html = page_htmls[page_url]
+                        page_tree = await _parse_html_async(page_html) if page_html else None
+                        if page_tree is None:
+                            continue
+                    page_products = self._extract_products_from_tree(page_tree, self.base_url)
                     for product in page_products:
                         product["category"] = category
-                        if not any(p["url"] == product["url"] for p in products):
+                        if product["url"] not in seen_urls:
+                            seen_urls.add(product["url"])
                             products.append(product)
                 
                 if products:
@@ -387,114 +382,143 @@ class StephanisScraper(BaseScraper):
                 print(f"Would filter for: {', '.join(self.category_filter)}")
             return []
 
-        await self._check_robots_txt()
-        await self.init_browser()
-        
         all_products = []
+        seen_product_urls: Set[str] = set()
         
         try:
+            # robots.txt (HTTP) and browser start-up are independent; both must finish before the first fetch.
+            # Started inside the try so close_browser() also runs (closing the HTTP session) if start-up fails
+            await asyncio.gather(self._check_robots_txt(), self.init_browser())
+
             # First, scrape main page thoroughly (but only if no category filter is set)
             # When category filter is active, we only scrape from category pages
             if not self.category_filter:
                 print("Scraping main page...")
-                html = await self._fetch_page(self.base_url, use_cache=False)
-                if html:
-                    soup = BeautifulSoup(html, 'lxml')
-                    # Find product links on main page
-                    # Stephanis uses /el/products/category/.../PRODUCTID pattern
-                    all_links = soup.find_all('a', href=True)
-                    product_links = []
-                    for link in all_links:
-                        href = link.get('href', '').lower()
-                        # Stephanis products: /el/products/.../NUMBER or /products/.../NUMBER
-                        if '/products/' in href and href.split('/')[-1].isdigit():
-                            product_links.append(link)
-
-                    print(f"  Found {len(product_links)} product links on main page")
-
-                    for link in product_links:
-                        container = link.parent
-                        product = None
-
-                        # Try multiple container levels
-                        if container:
-                            product = self._parse_product_card(container, self.base_url)
-                        if not product and container and container.parent:
-                            product = self._parse_product_card(container.parent, self.base_url)
-                        if not product and container and container.parent and container.parent.parent:
-                            product = self._parse_product_card(container.parent.parent, self.base_url)
-
-                        if product and not any(p["url"] == product["url"] for p in all_products):
-                            all_products.append(product)
             else:
                 print("Skipping main page scraping (category filter active)")
-                html = await self._fetch_page(self.base_url, use_cache=False)
-                if html:
-                    soup = BeautifulSoup(html, 'lxml')
-                    all_links = soup.find_all('a', href=True)
-                else:
-                    all_links = []
+            html = await self._fetch_page(self.base_url, use_cache=False)
+
+            # One pass over the main-page links collects both product links and category pages.
+            # Stephanis uses /el/products/category/.../PRODUCTID for products; category pages
+            # are under /products/ too but do not end with a number.
+            product_links = []
+            # Insertion-ordered dict keeps links unique without a later set() pass
+            found_links: Dict[str, None] = {}
+            tree = await _parse_html_async(html) if html else None
+            if tree is not None:
+                # Only /products/ links reach Python; the href is lower-cased only for the keyword check
+                for link in _PRODUCT_LINK_XPATH(tree):
+                    href = link.get('href')
+                    if href.rpartition('/')[2].isdigit():
+                        if not self.category_filter:
+                            product_links.append(link)
+                    elif len(found_links) < 10 and _CATEGORY_KEYWORD_RE.search(href.lower()):
+                        full_url = _join_url(self.base_url, href)
+                        if full_url.startswith('http') and self._matches_category_filter(full_url):
+                            found_links[full_url] = None
+
+            if html and not self.category_filter:
+                print(f"  Found {len(product_links)} product links on main page")
+
+                # Image and title links of one card share containers; parse each container once
+                card_results: Dict[object, Optional[Dict]] = {}
+                for link in product_links:
+                    if self._product_limit_reached(all_products):
+                        break
+                    # Try multiple container levels: parent, grandparent, great-grandparent
+                    product = None
+                    for container in islice(link.iterancestors(), 3):
+                        if container in card_results:
+                            product = card_results[container]
+                        else:
+                            product = card_results[container] = self._parse_product_card(container, self.base_url)
+                        if product:
+                            break
+
+                    if product and product["url"] not in seen_product_urls:
+                        seen_product_urls.add(product["url"])
+                        all_products.append(product)
 
             # Look for category links - Stephanis uses /el/products/CATEGORY/ pattern
             if html:
                 print("  Looking for category links...")
-                category_links = []
-                for link in all_links:
-                    href = link.get('href', '').lower()
-                    # Look for category pages (not product pages - those end with numbers)
-                    if '/products/' in href and not href.split('/')[-1].isdigit():
-                        if any(cat in href for cat in ['information-technology', 'telecommunications', 'laptops', 'smartphones', 'televisions', 'gaming', 'tablets', 'phones', 'computers', 'mobile']):
-                            full_url = urljoin(self.base_url, link.get('href', ''))
-                            if full_url.startswith('http') and self._matches_category_filter(full_url):
-                                category_links.append(full_url)
-
-                category_links = list(set(category_links))[:10]
+                category_links = list(found_links)
                 print(f"  Found {len(category_links)} category pages to scrape (after filter)")
 
-                for cat_url in category_links:
-                    cat_html = await self._fetch_page(cat_url)
-                    if cat_html:
-                        cat_soup = BeautifulSoup(cat_html, 'lxml')
-                        paged_urls = self._build_paginated_urls(cat_url, cat_soup)
-                        print(f"    Found {len(paged_urls)} page(s) in {cat_url}")
+                if self._product_limit_reached(all_products):
+                    category_links = []
 
+                # Fetch the first page of every category concurrently; it also lists the pagination
+                cat_htmls = await self._run_bounded(self._fetch_page, category_links)
+                listing_pages = []  # (page_url, parsed first page or None), in category and page order
+                for cat_url, cat_html in zip(category_links, cat_htmls):
+                    cat_tree = await _parse_html_async(cat_html) if cat_html else None
+                    if cat_tree is not None:
+                        paged_urls = self._build_paginated_urls(cat_url, cat_tree)
+                        print(f"    Found {len(paged_urls)} page(s) in {cat_url}")
                         for page_url in paged_urls:
-                            print(f"    Fetching page: {page_url}")
-                            page_html = cat_html if page_url == cat_url else await self._fetch_page(page_url)
-                            if not page_html:
-                                continue
-                            page_soup = BeautifulSoup(page_html, 'lxml')
-                            page_products = self._extract_products_from_soup(page_soup, self.base_url)
-                            for product in page_products:
-                                if product and not any(p["url"] == product["url"] for p in all_products):
-                                    all_products.append(product)
+                            # First page is already parsed
+                            listing_pages.append((page_url, cat_tree if page_url == cat_url else None))
+
+                # Fetch the remaining pagination pages concurrently, then merge everything in order
+                pending_urls = list(dict.fromkeys(page_url for page_url, page_tree in listing_pages if page_tree is None))
+                print(f"    Fetching {len(pending_urls)} pagination page(s), up to {config.MAX_CONCURRENCY} at a time...")
+                page_htmls = dict(zip(pending_urls, await self._run_bounded(self._fetch_page, pending_urls)))
+
+                for page_url, page_tree in listing_pages:
+                    if self._product_limit_reached(all_products):
+                        break
+                    if page_tree is None:
+                        page_html = page_htmls.get(page_url)
+                        page_tree = await _parse_html_async(page_html) if page_html else None
+                        if page_tree is None:
+                            continue
+                    page_products = self._extract_products_from_tree(page_tree, self.base_url)
+                    for product in page_products:
+                        if self._product_limit_reached(all_products):
+                            break
+                        if product and product["url"] not in seen_product_urls:
+                            seen_product_urls.add(product["url"])
+                            all_products.append(product)
             
             # Try scraping by category (only if no category filter, or category matches filter)
-            for category in self.categories:
-                # Skip if category filter is set and this category doesn't match
-                if self.category_filter and category not in self.category_filter:
-                    continue
-
+            categories = [category for category in self.categories
+                          if not self.category_filter or category in self.category_filter]
+            if categories and self._product_limit_reached(all_products):
+                print(f"[INFO] Reached product limit ({config.MAX_PRODUCTS}), skipping remaining categories")
+                categories = []
+
+            # Scrape the categories concurrently (fetch_semaphore bounds the pages in flight),
+            # then merge them in category order
+            for category in categories:
                 print(f"Scraping category: {category}")
-                category_products = await self._scrape_category(category)
+            category_results = await asyncio.gather(*(self._scrape_category(category) for category in categories))
+            for category, category_products in zip(categories, category_results):
+                if self._product_limit_reached(all_products):
+                    print(f"[INFO] Reached product limit ({config.MAX_PRODUCTS}), skipping remaining categories")
+                    break
                 for product in category_products:
-                    if not any(p["url"] == product["url"] for p in all_products):
+                    if self._product_limit_reached(all_products):
+                        break
+                    if product["url"] not in seen_product_urls:
+                        seen_product_urls.add(product["url"])
                         all_products.append(product)
-                print(f"  Found {len(category_products)} products\n")
+                print(f"  Found {len(category_products)} products in {category}\n")
             
             # Fetch prices from product pages for products without prices
             print(f"\nFetching prices from product pages...")
             products_to_update = [p for p in all_products if p.get("price", 0) == 0]
             print(f"  {len(products_to_update)} products need price information")
             
-            for product in products_to_update:
-                details = await self._fetch_product_details(product["url"])
+            all_details = await self._run_bounded(
+                lambda product: self._fetch_product_details(product["url"]), products_to_update
+            )
+            for product, details in zip(products_to_update, all_details):
                 if details and details.get("price"):
                     product["price"] = details["price"]
                     if details.get("original_price"):
                         product["original_price"] = details["original_price"]
-                        if product["price"] and product["original_price"]:
-                            product["discount_percentage"] = ((product["original_price"] - product["price"]) / product["original_price"]) * 100
+                        product["discount_percentage"] = self._discount_pct(product["price"], product["original_price"])
                     if details.get("description"):
                         product["description"] = details["description"]
                     print(f"  [OK] Found price for: {product['name'][:50]} - {product['price']} EUR")
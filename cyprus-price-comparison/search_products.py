@@ -1,8 +1,27 @@
 """Search for products across stores using the master product grouping."""
-from typing import List, Dict, Optional
+from collections import defaultdict
+from functools import lru_cache
+from heapq import nlargest
+from operator import itemgetter
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from models import Product, MasterProduct, MasterProductVariant, get_session
 from product_matcher import ProductMatcher
 
+# Only the text helpers are used here, so the matcher never opens its own session
+_MATCHER = ProductMatcher()
+
+
+@lru_cache(maxsize=1024)
+def _parse_query(query: str) -> Tuple[str, Tuple[str, ...], Optional[str]]:
+    """Normalized base name, base tokens and capacity of a search query (memoised per raw query)."""
+    return (
+        _MATCHER.normalize_text_base(query),
+        tuple(_MATCHER.extract_base_tokens(query)),
+        _MATCHER.extract_capacity(query),
+    )
+
 
 def _format_capacity(capacity: Optional[str]) -> str:
     if not capacity or capacity == "unknown":
@@ -10,23 +29,62 @@ def _format_capacity(capacity: Optional[str]) -> str:
     return capacity.upper()
 
 
-def search_products(query: str, limit: int = 20) -> List[Dict]:
+# Product columns read by search results; description, specifications and the rest stay unloaded
+_STORE_COLUMNS = (
+    Product.master_product_id, Product.variant_id, Product.store, Product.price, Product.url,
+    Product.name, Product.availability, Product.original_price, Product.discount_percentage
+)
+
+
+def _price_summary(products: List[Product]) -> Tuple[int, float, float]:
+    """Return (store count, cheapest, most expensive), pricing positive listings only."""
+    prices = [p.price for p in products if p.price > 0]
+    return len(products), (min(prices) if prices else 0), (max(prices) if prices else 0)
+
+
+def _price_summaries(session, key_column, keys: List[int]) -> Dict[int, Tuple[int, float, float]]:
+    """Compute _price_summary per key in the database without loading the product rows."""
+    positive_price = case((Product.price > 0, Product.price))
+    rows = session.query(
+        key_column, func.count(Product.id), func.min(positive_price), func.max(positive_price)
+    ).filter(key_column.in_(keys)).group_by(key_column)
+    return {
+        key: (count, cheapest if cheapest is not None else 0, most_expensive if most_expensive is not None else 0)
+        for key, count, cheapest, most_expensive in rows
+    }
+
+
+def _store_entries(products: List[Product]) -> List[Dict]:
+    """Per-store listing dicts; products are already loaded in price order."""
+    return [{
+        'store': product.store,
+        'price': product.price,
+        'url': product.url,
+        'name': product.name,
+        'availability': product.availability,
+        'original_price': product.original_price,
+        'discount_percentage': product.discount_percentage
+    } for product in products]
+
+
+def search_products(query: str, limit: int = 20, include_stores: bool = True) -> List[Dict]:
     """
     Search for products by query string.
     Returns master products with all their store variants.
 
+    With include_stores=False the 'stores' lists are left out and the price
+    summary is aggregated in the database instead of loading every listing.
+
     Example:
         results = search_products("iphone 16 128gb")
         # Returns all stores selling iPhone 16 128GB
     """
     session = get_session()
-    matcher = ProductMatcher()
+    matcher = _MATCHER
 
     try:
         # Normalize the search query (base model) and extract capacity if present
-        normalized_query = matcher.normalize_text_base(query)
-        tokens = matcher.extract_base_tokens(query)
-        capacity_query = matcher.extract_capacity(query)
+        normalized_query, tokens, capacity_query = _parse_query(query)
 
         results = []
 
@@ -40,39 +98,74 @@ def search_products(query: str, limit: int = 20) -> List[Dict]:
 
         # If no direct match, try token-based search
         if not masters and tokens:
-            masters = session.query(MasterProduct).all()
+            # A master needs at least one query token in common to reach the overlap threshold, so
+            # let the database drop masters whose search_tokens contain none of them
+            candidates = session.query(MasterProduct).filter(
+                or_(*(MasterProduct.search_tokens.like(f"%{token}%") for token in dict.fromkeys(tokens)))
+            ).order_by(MasterProduct.id).yield_per(500)
             # Filter by token overlap
             scored_masters = []
-            for master in masters:
+            for master in candidates:
                 master_tokens = master.search_tokens.split() if master.search_tokens else []
                 overlap = matcher.calculate_token_overlap(tokens, master_tokens)
                 if overlap >= 0.3:  # At least 30% token overlap
                     scored_masters.append((master, overlap))
 
-            # Sort by score and take top results
-            scored_masters.sort(key=lambda x: x[1], reverse=True)
-            masters = [m[0] for m in scored_masters[:limit]]
-
-        # For each master product, get all store variants
-        for master in masters:
+            # Take the top results by score (nlargest keeps equal scores in id order, like a stable sort)
+            masters = [m[0] for m in nlargest(limit, scored_masters, key=itemgetter(1))]
+
+        # Load the variants and store products of all matched masters with one query each
+        # instead of one per master/variant; variants are grouped in id order, products come
+        # back cheapest first (ties by id), which is the order the 'stores' lists are shown in
+        master_ids = [master.id for master in masters]
+        variants_by_master: Dict[int, List[MasterProductVariant]] = defaultdict(list)
+        products_by_master: Dict[int, List[Product]] = defaultdict(list)
+        products_by_variant: Dict[int, List[Product]] = defaultdict(list)
+        summary_by_master: Dict[int, Tuple[int, float, float]] = {}
+        summary_by_variant: Dict[int, Tuple[int, float, float]] = {}
+        if master_ids:
             variants_query = session.query(MasterProductVariant).filter(
-                MasterProductVariant.master_product_id == master.id
+                MasterProductVariant.master_product_id.in_(master_ids)
             )
             if capacity_query:
                 variants_query = variants_query.filter(
                     MasterProductVariant.capacity == capacity_query
                 )
-            variants = variants_query.all()
+            for variant in variants_query.order_by(MasterProductVariant.id):
+                variants_by_master[variant.master_product_id].append(variant)
+
+            # Masters without (matching) variants list their products directly
+            bare_master_ids = [master_id for master_id in master_ids if master_id not in variants_by_master]
+            if bare_master_ids and not include_stores:
+                summary_by_master = _price_summaries(session, Product.master_product_id, bare_master_ids)
+            elif bare_master_ids:
+                for product in session.query(Product).options(load_only(*_STORE_COLUMNS)).filter(
+                    Product.master_product_id.in_(bare_master_ids)
+                ).order_by(Product.price, Product.id):
+                    products_by_master[product.master_product_id].append(product)
+
+            variant_ids = [variant.id for variants in variants_by_master.values() for variant in variants]
+            if variant_ids and not include_stores:
+                summary_by_variant = _price_summaries(session, Product.variant_id, variant_ids)
+            elif variant_ids:
+                for product in session.query(Product).options(load_only(*_STORE_COLUMNS)).filter(
+                    Product.variant_id.in_(variant_ids)
+                ).order_by(Product.price, Product.id):
+                    products_by_variant[product.variant_id].append(product)
+
+        # For each master product, get all store variants
+        for master in masters:
+            variants = variants_by_master.get(master.id, [])
 
             if not variants:
-                products = session.query(Product).filter(
-                    Product.master_product_id == master.id
-                ).all()
-                if not products:
+                products = products_by_master.get(master.id, [])
+                if include_stores:
+                    summary = _price_summary(products) if products else None
+                else:
+                    summary = summary_by_master.get(master.id)
+                if not summary:
                     continue
-                prices = [p.price for p in products if p.price > 0]
-                cheapest_price = min(prices) if prices else 0
-                most_expensive = max(prices) if prices else 0
+                store_count, cheapest_price, most_expensive = summary
 
                 result = {
                     'variant_id': None,
@@ -84,37 +177,23 @@ def search_products(query: str, limit: int = 20) -> List[Dict]:
                     'category': master.category,
                     'cheapest_price': cheapest_price,
                     'most_expensive': most_expensive,
-                    'price_difference': most_expensive - cheapest_price if prices else 0,
-                    'store_count': len(products),
-                    'stores': []
+                    'price_difference': most_expensive - cheapest_price,
+                    'store_count': store_count
                 }
-
-                for product in products:
-                    result['stores'].append({
-                        'store': product.store,
-                        'price': product.price,
-                        'url': product.url,
-                        'name': product.name,
-                        'availability': product.availability,
-                        'original_price': product.original_price,
-                        'discount_percentage': product.discount_percentage
-                    })
-
-                result['stores'].sort(key=lambda x: x['price'])
+                if include_stores:
+                    result['stores'] = _store_entries(products)
                 results.append(result)
                 continue
 
             for variant in variants:
-                products = session.query(Product).filter(
-                    Product.variant_id == variant.id
-                ).all()
-
-                if not products:
+                products = products_by_variant.get(variant.id, [])
+                if include_stores:
+                    summary = _price_summary(products) if products else None
+                else:
+                    summary = summary_by_variant.get(variant.id)
+                if not summary:
                     continue
-
-                prices = [p.price for p in products if p.price > 0]
-                cheapest_price = min(prices) if prices else 0
-                most_expensive = max(prices) if prices else 0
+                store_count, cheapest_price, most_expensive = summary
 
                 capacity_display = _format_capacity(variant.capacity)
                 display_name = master.canonical_name
@@ -131,23 +210,11 @@ def search_products(query: str, limit: int = 20) -> List[Dict]:
                     'category': master.category,
                     'cheapest_price': cheapest_price,
                     'most_expensive': most_expensive,
-                    'price_difference': most_expensive - cheapest_price if prices else 0,
-                    'store_count': len(products),
-                    'stores': []
+                    'price_difference': most_expensive - cheapest_price,
+                    'store_count': store_count
                 }
-
-                for product in products:
-                    result['stores'].append({
-                        'store': product.store,
-                        'price': product.price,
-                        'url': product.url,
-                        'name': product.name,
-                        'availability': product.availability,
-                        'original_price': product.original_price,
-                        'discount_percentage': product.discount_percentage
-                    })
-
-                result['stores'].sort(key=lambda x: x['price'])
+                if include_stores:
+                    result['stores'] = _store_entries(products)
                 results.append(result)
 
                 if len(results) >= limit:
@@ -159,7 +226,6 @@ def search_products(query: str, limit: int = 20) -> List[Dict]:
         return results
 
     finally:
-        matcher.close()  # Close ProductMatcher session to prevent leak
         session.close()
 
 
@@ -231,11 +297,11 @@ def get_best_deals(store: str = None, limit: int = 10) -> List[Dict]:
         if store:
             query = query.filter(Product.store == store)
 
-        # Get products with discounts
+        # Get products with discounts (equal discounts stay in id order whichever index is used)
         products = query.filter(
             Product.discount_percentage.isnot(None),
             Product.discount_percentage > 0
-        ).order_by(Product.discount_percentage.desc()).limit(limit).all()
+        ).order_by(Product.discount_percentage.desc(), Product.id).limit(limit).all()
 
         results = []
         for product in products:
@@ -260,7 +326,10 @@ def get_product_by_master_id(master_id: int) -> Dict:
     session = get_session()
 
     try:
-        master = session.query(MasterProduct).filter(MasterProduct.id == master_id).first()
+        # Variants and their products load eagerly (one IN query each) instead of one query per variant
+        master = session.query(MasterProduct).options(
+            selectinload(MasterProduct.variants).selectinload(MasterProductVariant.products)
+        ).filter(MasterProduct.id == master_id).first()
 
         if not master:
             return None
@@ -273,15 +342,10 @@ def get_product_by_master_id(master_id: int) -> Dict:
             'stores': []
         }
 
-        variants = session.query(MasterProductVariant).filter(
-            MasterProductVariant.master_product_id == master_id
-        ).all()
+        variants = master.variants
 
         if not variants:
-            products = session.query(Product).filter(
-                Product.master_product_id == master_id
-            ).all()
-            for product in products:
+            for product in master.products:
                 result['stores'].append({
                     'store': product.store,
                     'price': product.price,
@@ -292,9 +356,7 @@ def get_product_by_master_id(master_id: int) -> Dict:
 
         result['variants'] = []
         for variant in variants:
-            products = session.query(Product).filter(
-                Product.variant_id == variant.id
-            ).all()
+            products = variant.products
             if not products:
                 continue
             result['variants'].append({
@@ -319,23 +381,23 @@ def get_product_by_variant_id(variant_id: int) -> Dict:
     session = get_session()
 
     try:
-        variant = session.query(MasterProductVariant).filter(
+        # Master (joined) and store products (one IN query) load with the variant
+        variant = session.query(MasterProductVariant).options(
+            joinedload(MasterProductVariant.master_product),
+            selectinload(MasterProductVariant.products)
+        ).filter(
             MasterProductVariant.id == variant_id
         ).first()
 
         if not variant:
             return None
 
-        master = session.query(MasterProduct).filter(
-            MasterProduct.id == variant.master_product_id
-        ).first()
+        master = variant.master_product
 
         if not master:
             return None
 
-        products = session.query(Product).filter(
-            Product.variant_id == variant_id
-        ).all()
+        products = variant.products
 
         result = {
             'variant_id': variant.id,